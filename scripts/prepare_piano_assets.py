@@ -12,6 +12,7 @@ What it does:
 Requirements:
   - macOS (or Linux)
   - ffmpeg in PATH  (brew install ffmpeg)
+  - numpy            (pip install numpy)
 
 Usage:
   python3 scripts/prepare_piano_assets.py --source "/path/to/raw_piano_samples"
@@ -23,14 +24,18 @@ Optional flags:
   --length 6.0                  (seconds, max sample duration)
   --generate-placeholders yes   (yes/no) create test samples when source empty
   --roots "21,24,27,...,108"    (MIDI root notes to render)
+  --jobs 8                      (parallel ffmpeg workers, default: CPU count)
 
 This script writes assets-manifest.json at project root with a summary.
 """
 
-import argparse, json, os, re, struct, subprocess, sys, shutil
+import argparse, json, os, re, subprocess, sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
-from math import sin, pi, exp
-import random
+from functools import lru_cache
+from math import pi
+
+import numpy as np
 
 NOTE_NAMES = ['C','C#','D','D#','E','F','F#','G','G#','A','A#','B']
 NAME_ALIASES = {'Db':'C#','Eb':'D#','Gb':'F#','Ab':'G#','Bb':'A#'}
@@ -46,11 +51,33 @@ EXPECTED_IRS = {
   "plate.wav":       "plate.wav"
 }
 
+SAMPLE_FILTER_CHAIN = ",".join([
+  "highpass=f=20",
+  "silenceremove=start_periods=1:start_silence=0.02:start_threshold=-50dB",
+  "atrim=0:{length}",
+  "dynaudnorm=f=75:g=15:p=0.95",
+  "volume=0.0dB",
+  "afade=t=out:st={fade_st}:d={fade_d}"
+])
+
+CODEC_ARGS = {
+  "mp3": ["-codec:a","libmp3lame","-qscale:a","3"],
+  "wav": ["-codec:a","pcm_s16le"]
+}
+
+IR_PRESETS = {
+  'studio':      dict(decay=0.9,  seconds=0.9,  hf_decay=0.7,  early=[(6,0.6),(11,0.4)]),
+  'medium-room': dict(decay=1.2,  seconds=1.5,  hf_decay=0.6,  early=[(7,0.7),(13,0.5),(23,0.35)]),
+  'hall':        dict(decay=1.8,  seconds=2.6,  hf_decay=0.55, early=[(9,0.8),(17,0.6),(31,0.45),(47,0.3)]),
+  'cathedral':   dict(decay=2.5,  seconds=4.2,  hf_decay=0.5,  early=[(12,0.9),(23,0.7),(41,0.55),(73,0.35),(97,0.25)]),
+  'plate':       dict(decay=1.6,  seconds=1.8,  hf_decay=0.75, early=[(5,0.95),(11,0.75),(19,0.55),(29,0.35)])
+}
+
 # ----------------------------- ffmpeg utils --------------------------------
 
-def run(cmd):
+def run(cmd, input=None):
   try:
-    r = subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    r = subprocess.run(cmd, input=input, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
     return r.stdout.decode('utf-8','ignore'), r.stderr.decode('utf-8','ignore')
   except subprocess.CalledProcessError as e:
     out = e.stdout.decode('utf-8','ignore')
@@ -58,6 +85,13 @@ def run(cmd):
     print(f"[ffmpeg] ERROR running: {' '.join(cmd)}\n{err}")
     raise
 
+def filter_thread_args(threads=0):
+  """
+  Global ffmpeg threading options for the filter graphs (0 = one thread per core).
+  Encoders get the matching "-threads" as an output option next to each output file.
+  """
+  return ["-filter_threads", str(threads), "-filter_complex_threads", str(threads)]
+
 def have_ffmpeg():
   try:
     subprocess.run(['ffmpeg','-version'], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
@@ -76,40 +110,111 @@ def ffprobe_ok(path: Path):
   except subprocess.CalledProcessError:
     return False
 
+def ffprobe_audio_info(path: Path):
+  """
+  (sample_rate, channels) of the first audio stream, or None if ffprobe can't read it.
+  """
+  try:
+    r = subprocess.run(
+      ['ffprobe','-v','error','-select_streams','a:0','-show_entries','stream=sample_rate,channels',
+       '-of','json', str(path)],
+      check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+  except subprocess.CalledProcessError:
+    return None
+  try:
+    stream = json.loads(r.stdout.decode('utf-8','ignore'))['streams'][0]
+    return int(stream['sample_rate']), int(stream['channels'])
+  except (ValueError, KeyError, IndexError):
+    return None
+
+def wav_ok(path: Path):
+  """
+  In-process RIFF/WAVE signature check; no ffprobe process for the common case.
+  """
+  try:
+    with open(path, 'rb') as f:
+      hdr = f.read(12)
+    return hdr[:4] == b'RIFF' and hdr[8:12] == b'WAVE'
+  except OSError:
+    return False
+
+def audio_info(path: Path):
+  """
+  (sample_rate, channels) or None. PCM WAVs are read from their header; anything else falls back to ffprobe.
+  """
+  if wav_ok(path):
+    import wave
+    try:
+      with wave.open(str(path), 'rb') as w:
+        return w.getframerate(), w.getnchannels()
+    except (wave.Error, EOFError):
+      pass  # e.g. float/extensible WAV -> let ffprobe decide
+  return ffprobe_audio_info(path)
+
+def probe_audio_info(paths):
+  """
+  audio_info for many files at once -> {path: info}. Header reads are instant; any ffprobe
+  fallbacks run concurrently (xargs -P style) so their process startup overlaps.
+  """
+  paths = list(paths)
+  if not paths: return {}
+  with ThreadPoolExecutor(max_workers=len(paths)) as ex:
+    return dict(zip(paths, ex.map(audio_info, paths)))
+
 # ----------------------------- MIDI parsing --------------------------------
 
+_NOTE_RE = re.compile(r'([A-Ga-g])([#b]?)(-?\d{1,2})')
+_NUM_RE = re.compile(r'\b(\d{2,3})\b')
+_TOK_RE = re.compile(r'([A-Ga-g][#b]?-?\d{1,2})')
+_NOTE_IDX = {n: i for i, n in enumerate(NOTE_NAMES)}
+
 def midi_from_note_name(token):
-  m = re.fullmatch(r'([A-Ga-g])([#b]?)(-?\d{1,2})', token.strip())
+  m = _NOTE_RE.fullmatch(token.strip())
   if not m: return None
   n, accidental, octv = m.groups()
   name = n.upper() + accidental
   name = NAME_ALIASES.get(name, name)
-  if name not in NOTE_NAMES: return None
-  midi = NOTE_NAMES.index(name) + (int(octv)+1)*12
+  idx = _NOTE_IDX.get(name)
+  if idx is None: return None
+  midi = idx + (int(octv)+1)*12
   return midi
 
 def guess_midi_from_filename(fname):
   base = Path(fname).stem
-  m = re.search(r'\b(\d{2,3})\b', base)
+  m = _NUM_RE.search(base)
   if m:
     v = int(m.group(1))
     if 0 <= v <= 127:
       return v
-  tokens = re.findall(r'([A-Ga-g][#b]?-?\d{1,2})', base)
+  tokens = _TOK_RE.findall(base)
   for tok in tokens:
     midi = midi_from_note_name(tok)
     if midi is not None: return midi
   return None
 
 def scan_source_files(source_dir):
-  files = []
-  for root, _, names in os.walk(source_dir):
-    for n in names:
-      p = Path(root)/n
-      if p.suffix.lower() in AUDIO_EXTS:
-        midi = guess_midi_from_filename(n)
-        files.append((p, midi))
-  return files
+  """
+  Yields (path, midi-or-None) for every audio file under source_dir.
+  Uses os.scandir so dir/file classification comes from the readdir entry (no extra stat per file).
+  """
+  stack = [str(source_dir)]
+  while stack:
+    d = stack.pop()
+    try:
+      it = os.scandir(d)
+    except OSError:
+      continue  # unreadable dir: skip like os.walk does
+    subdirs = []
+    with it:
+      for e in it:
+        if e.is_dir(follow_symlinks=False):
+          subdirs.append(e.path)
+        elif e.is_file() and os.path.splitext(e.name)[1].lower() in AUDIO_EXTS:
+          yield Path(e.path), guess_midi_from_filename(e.name)
+    # reversed so subdirs pop in listing order: same top-down order as os.walk,
+    # which matters because main() picks the first file found per MIDI note
+    stack.extend(reversed(subdirs))
 
 def nearest_available(target, available_midis):
   if not available_midis: return None
@@ -120,30 +225,63 @@ def nearest_available(target, available_midis):
 def ensure_dir(p: Path):
   p.mkdir(parents=True, exist_ok=True)
 
-def convert_with_ffmpeg(src: Path, dst: Path, mono=True, sr=44100, length_sec=6.0, out_format='mp3'):
+def sample_filter_chain(length_sec=6.0):
+  # fade never starts before 0 nor runs past the trimmed end, even for very short lengths
+  fade_d = min(0.2, length_sec)
+  return SAMPLE_FILTER_CHAIN.format(length=length_sec, fade_st=round(max(0.0, length_sec-fade_d), 3), fade_d=fade_d)
+
+def codec_args(dst: Path, out_format='mp3'):
+  codec = CODEC_ARGS.get(out_format.lower()) or CODEC_ARGS.get(dst.suffix.lower().lstrip('.'))
+  if codec is None:
+    raise SystemExit("Unsupported output format. Use mp3 or wav.")
+  return codec
+
+def convert_with_ffmpeg(src: Path, dst: Path, mono=True, sr=44100, length_sec=6.0, out_format='mp3', already_clean=False, pcm=None, threads=0):
+  """
+  already_clean=True skips the trim/normalize/fade chain (for our own placeholders) and only transcodes.
+  pcm (mono float samples at sr) replaces src: it is piped to ffmpeg as s16le on stdin, no temp file.
+  """
   ensure_dir(dst.parent)
-  af = [
-    "highpass=f=20",
-    "silenceremove=start_periods=1:start_silence=0.02:start_threshold=-50dB",
-    f"atrim=0:{length_sec}",
-    "dynaudnorm=f=75:g=15:p=0.95",
-    "volume=0.0dB",
-    "afade=t=out:st={}:d=0.2".format(max(0.1, length_sec-0.2))
-  ]
-  ch = ["-ac","1"] if mono else []
-  codec = []
-  fmt = dst.suffix.lower()
-  if out_format.lower() == 'mp3' or fmt == '.mp3':
-    codec = ["-codec:a","libmp3lame","-qscale:a","3"]
-  elif out_format.lower() == 'wav' or fmt == '.wav':
-    codec = ["-codec:a","pcm_s16le"]
+  if pcm is not None:
+    inp = ["-f","s16le","-ar",str(sr),"-ac","1","-i","pipe:0"]
+    data = pcm16(pcm).astype('<i2', copy=False).tobytes()
   else:
-    raise SystemExit("Unsupported output format. Use mp3 or wav.")
-  cmd = ["ffmpeg","-y","-i",str(src),"-vn","-ar",str(sr)] + ch + ["-af", ",".join(af)] + codec + [str(dst)]
+    inp = ["-i",str(src)]
+    data = None
+  ch = ["-ac","1"] if mono else []
+  af = [] if already_clean else ["-af", sample_filter_chain(length_sec)]
+  codec = codec_args(dst, out_format)
+  cmd = ["ffmpeg","-y"] + filter_thread_args(threads) + inp + ["-vn","-ar",str(sr)] + ch + af + codec + ["-threads",str(threads),str(dst)]
+  run(cmd, input=data)
+
+def convert_batch_with_ffmpeg(pairs, mono=True, sr=44100, length_sec=6.0, out_format='mp3', threads=0):
+  """
+  Same as convert_with_ffmpeg for many (src, dst) pairs, but in ONE ffmpeg run:
+  every input gets its own copy of the filter chain in a -filter_complex graph and
+  is mapped to its own output, so process startup/codec init is paid once.
+  """
+  af = sample_filter_chain(length_sec)
+  ch = ["-ac","1"] if mono else []
+  inputs, graph, outputs = [], [], []
+  for i, (src, dst) in enumerate(pairs):
+    ensure_dir(dst.parent)
+    inputs += ["-i", str(src)]
+    graph.append(f"[{i}:a]{af}[a{i}]")
+    outputs += ["-map", f"[a{i}]", "-ar", str(sr)] + ch + codec_args(dst, out_format) + ["-threads", str(threads), str(dst)]
+  cmd = ["ffmpeg","-y"] + filter_thread_args(threads) + inputs + ["-filter_complex", ";".join(graph)] + outputs
   run(cmd)
 
 # --------------------- Procedural impulse generation -----------------------
 
+def pcm16(data, out=None):
+  """
+  Float samples -> 16-bit PCM: clip to [-1, 1], scale by 32767, truncate (cast lands directly in out).
+  """
+  if out is None:
+    out = np.empty(len(data), dtype=np.int16)
+  out[...] = np.clip(np.asarray(data, dtype=np.float64), -1, 1) * 32767
+  return out
+
 def write_wav_stereo(path: Path, dataL, dataR, sr=44100):
   ensure_dir(path.parent)
   import wave
@@ -151,67 +289,92 @@ def write_wav_stereo(path: Path, dataL, dataR, sr=44100):
     w.setnchannels(2)
     w.setsampwidth(2)  # 16-bit
     w.setframerate(sr)
-    frames = bytearray()
-    for i in range(len(dataL)):
-      L = int(max(-1, min(1, dataL[i])) * 32767)
-      R = int(max(-1, min(1, dataR[i])) * 32767)
-      frames += struct.pack('<hh', L, R)
+    # interleaved L/R frames, written straight from the int16 buffer
+    frames = np.empty((len(dataL), 2), dtype=np.int16)
+    pcm16(dataL, out=frames[:, 0])
+    pcm16(dataR, out=frames[:, 1])
     w.writeframes(frames)
 
+def _pink_noise(N, rng, sr=44100):
+  """
+  N samples of unit-RMS 1/f noise, shaped in the frequency domain (one irfft, no per-sample filter).
+  Bins below 20 Hz are zeroed (same floor as the highpass=f=20 on samples) so no energy is infrasonic.
+  """
+  M = N//2 + 1
+  Z = (rng.standard_normal(M) + 1j*rng.standard_normal(M)).astype(np.complex64)
+  Z *= 1/np.sqrt(np.arange(1, M+1, dtype=np.float32))
+  Z[:int(20*N/sr)] = 0
+  noise = np.fft.irfft(Z, n=N).astype(np.float32)
+  return noise / noise.std()
+
+@lru_cache(maxsize=None)
+def _shared_ir_noise(sr=44100):
+  """
+  One pink-noise block long enough for the longest preset, split into L/R halves and
+  synthesized once per run; every preset slices its tail noise from it. Treat as read-only.
+  """
+  max_N = int(sr * max(p['seconds'] for p in IR_PRESETS.values()))
+  base = _pink_noise(2*max_N, np.random.default_rng(1337), sr)
+  return base[:max_N], base[max_N:]
+
+def _unit(x):
+  """
+  Zero-mean, unit-RMS copy of x: a slice of the shared block is neither on its own.
+  """
+  x = x - x.mean()
+  return x / x.std()
+
+def _ir_tail(pinkL, pinkR, sr, env_decay, hf):
+  """
+  Late reverb tail kernel: unit-RMS pink noise -> exponential decay, hf damping.
+  """
+  N = len(pinkL)
+  # 0.088 ~= RMS above 20 Hz of the one-pole (val + 0.05*n)/1.05 tail this replaced,
+  # so the audible tail level is unchanged
+  valL = pinkL * 0.088
+  valR = pinkR * 0.088
+  i = np.arange(N, dtype=np.float32)
+  # exponential envelope
+  e = np.exp(-i/(env_decay*sr))
+  # high-frequency damping towards end
+  hf_env = 1 - hf*(i/N)
+  return valL * e * hf_env * 0.6, valR * e * hf_env * 0.6
+
 def generate_ir(name: str, sr=44100):
   """
   Simple Schroeder-ish IR: exponentially decaying colored noise + early reflections.
   Different presets tweak decay/damping/ERs for: studio, medium-room, hall, cathedral, plate.
   """
-  presets = {
-    'studio':      dict(decay=0.9,  seconds=0.9,  hf_decay=0.7,  early=[(6,0.6),(11,0.4)]),
-    'medium-room': dict(decay=1.2,  seconds=1.5,  hf_decay=0.6,  early=[(7,0.7),(13,0.5),(23,0.35)]),
-    'hall':        dict(decay=1.8,  seconds=2.6,  hf_decay=0.55, early=[(9,0.8),(17,0.6),(31,0.45),(47,0.3)]),
-    'cathedral':   dict(decay=2.5,  seconds=4.2,  hf_decay=0.5,  early=[(12,0.9),(23,0.7),(41,0.55),(73,0.35),(97,0.25)]),
-    'plate':       dict(decay=1.6,  seconds=1.8,  hf_decay=0.75, early=[(5,0.95),(11,0.75),(19,0.55),(29,0.35)])
-  }
-  p = presets.get(name, presets['medium-room'])
+  p = IR_PRESETS.get(name, IR_PRESETS['medium-room'])
   N = int(sr * p['seconds'])
-  nl = [0.0]*N
-  nr = [0.0]*N
+  nl = np.zeros(N, dtype=np.float32)
+  nr = np.zeros(N, dtype=np.float32)
 
-  # Early reflections
-  for delay_ms, level in p['early']:
-    off = int(sr * (delay_ms/1000.0))
-    if off < N:
-      nl[off] += level
-      nr[max(0, off-1)] += level*0.98
+  # Early reflections (R lands one sample earlier)
+  offs = np.array([int(sr * (delay_ms/1000.0)) for delay_ms, _ in p['early']], dtype=np.int64)
+  levs = np.array([level for _, level in p['early']])
+  keep = offs < N
+  np.add.at(nl, offs[keep], levs[keep])
+  np.add.at(nr, np.maximum(0, offs[keep]-1), levs[keep]*0.98)
 
   # Late reverb tail: decaying colored noise with hf damping
-  rnd = random.Random(1337 + hash(name))
-  env_decay = p['decay']
-  hf = p['hf_decay']
-  valL = 0.0
-  valR = 0.0
-  for i in range(N):
-    # pink-ish noise
-    n = (rnd.random()*2-1)
-    valL = (valL + 0.05*n) / (1.05)
-    valR = (valR + 0.05*(rnd.random()*2-1)) / (1.05)
-    # exponential envelope
-    e = exp(-i/(env_decay*sr))
-    # high-frequency damping towards end
-    hf_env = (1 - hf*(i/N))
-    nl[i] += valL * e * hf_env * 0.6
-    nr[i] += valR * e * hf_env * 0.6
+  pinkL, pinkR = _shared_ir_noise(sr)
+  tailL, tailR = _ir_tail(_unit(pinkL[:N]), _unit(pinkR[:N]), sr, p['decay'], p['hf_decay'])
+  nl += tailL
+  nr += tailR
 
   # Tiny fade to avoid clicks
-  for i in range(int(sr*0.01)):
-    k = i/(sr*0.01)
-    nl[i] *= k; nr[i] *= k
-    nl[-i-1] *= k; nr[-i-1] *= k
+  k = np.arange(int(sr*0.01), dtype=np.float32) / (sr*0.01)
+  nl[:k.size] *= k; nr[:k.size] *= k
+  nl[N-k.size:] *= k[::-1]; nr[N-k.size:] *= k[::-1]
 
   return nl, nr
 
-def ensure_impulse(impulses_dir: Path, display_name: str, filename: str):
+def ensure_impulse(impulses_dir: Path, display_name: str, filename: str, probed=None):
   """
-  If <filename> exists and is valid => convert to stereo 44.1kHz (in place).
+  If <filename> exists and is valid => convert to stereo 44.1kHz (in place, skipped if it already is).
   If missing or invalid => generate procedurally and write it.
+  probed: optional {path: audio_info} from probe_audio_info, to skip re-probing the target.
   """
   target = impulses_dir/filename
   # Attempt to locate aliased names (e.g., 'yomedium-room')
@@ -225,18 +388,27 @@ def ensure_impulse(impulses_dir: Path, display_name: str, filename: str):
         if pat.search(base) and out == filename:
           # rename + convert
           try:
-            run(["ffmpeg","-y","-i",str(f),"-ar","44100","-ac","2",str(target)])
-            if ffprobe_ok(target): return str(target)
+            run(["ffmpeg","-y"] + filter_thread_args() + ["-i",str(f),"-ar","44100","-ac","2","-threads","0",str(target)])
+            if wav_ok(target) or ffprobe_ok(target): return str(target)
           except Exception:
             pass
 
-  if target.exists() and ffprobe_ok(target):
-    # Normalize sr/ac
+  if probed and target in probed:
+    info = probed[target]
+  else:
+    info = audio_info(target) if target.exists() else None
+  if info is not None:
+    # Already 44.1kHz stereo -> nothing to do
+    if info == (44100, 2):
+      return str(target)
+    # Normalize sr/ac (ffmpeg can't safely rewrite its own input, so go via a temp file)
+    tmp = target.with_suffix(".tmp.wav")
     try:
-      run(["ffmpeg","-y","-i",str(target),"-ar","44100","-ac","2",str(target)])
+      run(["ffmpeg","-y"] + filter_thread_args() + ["-i",str(target),"-ar","44100","-ac","2","-threads","0",str(tmp)])
+      os.replace(tmp, target)
       return str(target)
     except Exception:
-      pass
+      tmp.unlink(missing_ok=True)
 
   # Generate procedural IR
   name_key = filename.replace(".wav","")
@@ -250,17 +422,22 @@ def ensure_impulse(impulses_dir: Path, display_name: str, filename: str):
 
 def normalize_impulses(impulses_dir: Path):
   ensure_dir(impulses_dir)
+  irs = [("Studio", "studio.wav"), ("Medium Room", "medium-room.wav"), ("Hall", "hall.wav"),
+         ("Cathedral", "cathedral.wav"), ("Plate", "plate.wav")]
+  # validate every existing IR in one pass up front
+  probed = probe_audio_info(p for p in (impulses_dir/fn for _, fn in irs) if p.exists())
   produced = {}
-  produced["studio.wav"] = ensure_impulse(impulses_dir, "Studio", "studio.wav")
-  produced["medium-room.wav"] = ensure_impulse(impulses_dir, "Medium Room", "medium-room.wav")
-  produced["hall.wav"] = ensure_impulse(impulses_dir, "Hall", "hall.wav")
-  produced["cathedral.wav"] = ensure_impulse(impulses_dir, "Cathedral", "cathedral.wav")
-  produced["plate.wav"] = ensure_impulse(impulses_dir, "Plate", "plate.wav")
+  for display_name, filename in irs:
+    produced[filename] = ensure_impulse(impulses_dir, display_name, filename, probed)
   return produced
 
 # --------------------- Placeholder piano sample generation ------------------
 
+_FREQS = 440.0 * 2.0 ** ((np.arange(128) - 69) / 12.0)
+
 def midi_to_freq(m):
+  if 0 <= m < 128:
+    return float(_FREQS[m])
   return 440.0 * (2 ** ((m-69)/12.0))
 
 def write_wav_mono(path: Path, data, sr=44100):
@@ -270,11 +447,26 @@ def write_wav_mono(path: Path, data, sr=44100):
     w.setnchannels(1)
     w.setsampwidth(2)
     w.setframerate(sr)
-    frames = bytearray()
-    for i in range(len(data)):
-      s = int(max(-1, min(1, data[i])) * 32767)
-      frames += struct.pack('<h', s)
-    w.writeframes(frames)
+    w.writeframes(pcm16(data))
+
+def _note_body(N, sr, f, hammer):
+  """
+  Placeholder synthesis kernel: N samples at pitch f, hammer = white noise in [-1, 1) for the strike burst.
+  """
+  t = np.arange(N) / sr
+  env = np.minimum(1.0, t/0.01) * np.exp(-t/2.0)  # attack ~10ms, decay ~2.0s
+  val = (np.sin(2*pi*f*t)*0.55 +
+         np.sin(2*pi*2.0*f*t)*0.22 +
+         np.sin(2*pi*3.01*f*t)*0.12 +
+         np.sin(2*pi*4.2*f*t)*0.08)
+  # hammer/strike noise at start
+  k = len(hammer)
+  val[:k] += hammer*0.4*(1 - np.arange(k)/(0.01*sr))
+  y = val * env
+  # fade tail gently
+  m = int(sr*0.02)
+  y[N-m:] *= np.arange(m-1, -1, -1) / (sr*0.02)
+  return y
 
 def generate_placeholder_note(midi: int, length=4.5, sr=44100):
   """
@@ -284,55 +476,64 @@ def generate_placeholder_note(midi: int, length=4.5, sr=44100):
   """
   N = int(sr*length)
   f = midi_to_freq(midi)
-  y = [0.0]*N
-  rnd = random.Random(2025 + midi)
-
-  for i in range(N):
-    t = i/sr
-    env = min(1.0, t/0.01) * exp(-t/2.0)  # attack ~10ms, decay ~2.0s
-    val = (sin(2*pi*f*t)*0.55 +
-           sin(2*pi*2.0*f*t)*0.22 +
-           sin(2*pi*3.01*f*t)*0.12 +
-           sin(2*pi*4.2*f*t)*0.08)
-    # hammer/strike noise at start
-    if i < int(0.01*sr):
-      val += (rnd.random()*2-1)*0.4*(1 - i/(0.01*sr))
-    y[i] = val * env
-  # fade tail gently
-  for i in range(int(sr*0.02)):
-    y[-i-1] *= i/(sr*0.02)
-  return y
+  rng = np.random.default_rng(2025 + midi)
+  hammer = rng.random(int(0.01*sr))*2-1
+  return _note_body(N, sr, f, hammer)
 
-def ensure_placeholder_or_convert(src_map, dst_path: Path, midi: int, out_format: str, length_sec: float):
+def ensure_placeholder_or_convert(src_map, dst_path: Path, midi: int, out_format: str, length_sec: float, threads=0):
   """
-  If we have a source file -> convert. Otherwise generate a placeholder WAV then convert to requested format.
+  If we have a source file -> convert. Otherwise generate a placeholder and write/encode it to the requested format.
   """
   if midi in src_map:
     src = src_map[midi]
     try:
-      convert_with_ffmpeg(src, dst_path, mono=True, sr=44100, length_sec=length_sec, out_format=out_format)
+      convert_with_ffmpeg(src, dst_path, mono=True, sr=44100, length_sec=length_sec, out_format=out_format, threads=threads)
       return True, f"converted from {src.name}"
     except Exception as e:
       return False, f"ffmpeg failed: {e}"
   else:
-    # Generate placeholder WAV then (if output is mp3) transcode
-    tmp_wav = dst_path.with_suffix('.wav')
+    # Generate placeholder, then write it as WAV or stream its PCM straight into the mp3 encoder
     y = generate_placeholder_note(midi, length=min(4.5, length_sec))
-    write_wav_mono(tmp_wav, y, sr=44100)
     if out_format.lower() == 'wav':
-      # rename to expected extension
-      if dst_path.suffix.lower() != '.wav':
-        shutil.move(str(tmp_wav), str(dst_path))
+      write_wav_mono(dst_path, y, sr=44100)
       return True, "generated placeholder (WAV)"
     else:
-      # transcode to mp3 then remove temp wav
       try:
-        convert_with_ffmpeg(tmp_wav, dst_path, mono=True, sr=44100, length_sec=length_sec, out_format='mp3')
-        tmp_wav.unlink(missing_ok=True)
+        convert_with_ffmpeg(None, dst_path, mono=True, sr=44100, length_sec=length_sec, out_format='mp3',
+                            already_clean=True, pcm=y, threads=threads)
         return True, "generated placeholder → MP3"
       except Exception as e:
         return False, f"placeholder transcode failed: {e}"
 
+def render_batch(batch, out_dir: Path, out_format: str, length_sec: float, threads=0):
+  """
+  Render a list of (midi, src) roots into out_dir/<midi>.<format>; all real sources go through a single ffmpeg run.
+  Roots without a src get a placeholder, which is already clean and only needs encoding.
+  Top-level so it can be shipped to a worker process. Returns [(midi, ok, msg, dst), ...].
+  """
+  results = []
+  pending = []  # (midi, src, dst)
+  for midi, src in batch:
+    dst = out_dir / f"{midi}.{out_format.lower()}"
+    if src is not None:
+      pending.append((midi, src, dst))
+    else:
+      ok, msg = ensure_placeholder_or_convert({}, dst, midi, out_format, length_sec, threads)
+      results.append((midi, ok, msg, dst))
+
+  if pending:
+    try:
+      convert_batch_with_ffmpeg([(src, dst) for _, src, dst in pending],
+                                mono=True, sr=44100, length_sec=length_sec, out_format=out_format, threads=threads)
+      results += [(midi, True, f"converted from {src.name}", dst) for midi, src, dst in pending]
+    except Exception:
+      # one unreadable input fails the whole graph -> redo one by one to isolate it
+      print(f"  [batch] ffmpeg batch failed; retrying {len(pending)} roots individually")
+      for midi, src, dst in pending:
+        ok, msg = ensure_placeholder_or_convert({midi: src}, dst, midi, out_format, length_sec, threads)
+        results.append((midi, ok, msg, dst))
+  return results
+
 # ----------------------------- Main ----------------------------------------
 
 def main():
@@ -343,6 +544,7 @@ def main():
   parser.add_argument("--format", default="mp3", choices=["mp3","wav"], help="Output audio format for samples")
   parser.add_argument("--length", type=float, default=6.0, help="Max length per sample (seconds)")
   parser.add_argument("--roots", default=",".join(map(str, DEFAULT_ROOTS)), help="Comma-separated MIDI roots to produce")
+  parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Parallel ffmpeg workers for rendering roots")
   parser.add_argument("--generate-placeholders", default="yes", choices=["yes","no"], help="When no source files, generate placeholders (keeps app usable)")
   args = parser.parse_args()
 
@@ -380,31 +582,42 @@ def main():
       print("       Proceeding with placeholder generation so the app is immediately playable.")
 
   # 3) Render roots
-  required_roots = [int(x) for x in args.roots.split(",") if x.strip()]
-  produced = {}
+  required_roots = list(dict.fromkeys(int(x) for x in args.roots.split(",") if x.strip()))
   print(f"[step] Producing {len(required_roots)} root samples into {out_dir} as {args.format.upper()}")
 
+  # choose exact or nearest source if available
+  jobs = {}
   for midi in required_roots:
-    # choose exact or nearest source if available
     chosen_src_midi = None
     if midi in by_midi:
       chosen_src_midi = midi
     elif by_midi:
       chosen_src_midi = nearest_available(midi, by_midi.keys())
-
-    dst = out_dir / f"{midi}.{args.format.lower()}"
-    if chosen_src_midi is not None:
-      src = by_midi[chosen_src_midi][0]
-      ok, msg = ensure_placeholder_or_convert({midi:src}, dst, midi, args.format, args.length)
-    else:
-      ok, msg = ensure_placeholder_or_convert({}, dst, midi, args.format, args.length)
-    produced[midi] = {"path": str(dst), "status": "ok" if ok else "fail", "detail": msg}
-    print(f"  [{ 'ok' if ok else '!!' }] {dst.name} — {msg}")
+    jobs[midi] = by_midi[chosen_src_midi][0] if chosen_src_midi is not None else None
+
+  # one ffmpeg run per worker (placeholders are seeded per-MIDI), so startup is paid once per batch
+  items = list(jobs.items())
+  n_workers = max(1, min(args.jobs, len(items)))
+  batches = [items[i::n_workers] for i in range(n_workers)]
+  # split the cores between the concurrent ffmpeg processes instead of each one grabbing them all
+  threads = max(1, (os.cpu_count() or 1) // n_workers)
+  results = {}
+  with ProcessPoolExecutor(max_workers=n_workers) as ex:
+    futures = [ex.submit(render_batch, batch, out_dir, args.format, args.length, threads) for batch in batches if batch]
+    for fut in as_completed(futures):
+      for midi, ok, msg, dst in fut.result():
+        results[midi] = {"path": str(dst), "status": "ok" if ok else "fail", "detail": msg}
+        print(f"  [{ 'ok' if ok else '!!' }] {dst.name} — {msg}")
+  produced = {midi: results[midi] for midi in required_roots}
 
   # 4) Manifest
+  generated_roots, failed_roots = [], []
+  for k, v in produced.items():
+    (generated_roots if v["status"]=='ok' else failed_roots).append(int(k))
+  generated_roots.sort()
   manifest = {
-    "generated_roots": sorted([int(k) for k,v in produced.items() if v["status"]=='ok']),
-    "failed_roots": [int(k) for k,v in produced.items() if v["status"]!='ok'],
+    "generated_roots": generated_roots,
+    "failed_roots": failed_roots,
     "output_format": args.format.lower(),
     "samples_dir": str(out_dir),
     "impulses_dir": str(ir_dir),